@@ -1,18 +1,36 @@
 from __future__ import annotations
 
 import argparse
+import re
+import string
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Iterable, Iterator
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from src.db import connect, init_db, executemany
+from src.db import close, connect, get_meta, init_db, insert_values, prune_snapshots, set_meta
 from src.settings import get_settings
 from src.utils import utcnow_iso
 
 FOOTBALL_DATA_BASE = "https://api.football-data.org/v4"
 ODDS_API_BASE = "https://api.the-odds-api.com/v4"
 
+# meta key holding the football-data ETag/Last-Modified from the last run
+FD_MATCHES_META_KEY = "http:fd_pl_matches"
+ODDS_BASE_META_KEY = "http:odds_base"
+
+# meta key holding the id/kick-off/teams of the last base odds events, so BTTS
+# still has candidates when the base call answers 304
+ODDS_EVENTS_META_KEY = "odds:base_events"
+
+# meta key counting collect runs, used to amortise snapshot retention
+RUNS_META_KEY = "collect:runs"
+PRUNE_EVERY_N_RUNS = 10
+
 # Markets supported by:
 #   GET /v4/sports/{sport_key}/odds
 BASE_ODDS_MARKETS = {"h2h", "spreads", "totals", "outrights"}
@@ -21,11 +39,101 @@ BASE_ODDS_MARKETS = {"h2h", "spreads", "totals", "outrights"}
 #   GET /v4/sports/{sport_key}/events/{event_id}/odds
 EVENT_ONLY_MARKETS = {"btts"}
 
+# Outcome-name dispatch (names compared after _norm). Totals map straight to
+# the (over, under) slot; the API's own "Over"/"Under" spelling is listed so
+# the common case is a single dict hit without normalising.
+_TOTALS_SIDES = {"Over": 0, "Under": 1, "over": 0, "under": 1}
+_BTTS_SIDES = {"yes": "yes", "y": "yes", "no": "no", "n": "no"}
+
+# Statement text is kept identical across calls so sqlite3's per-connection
+# statement cache hands back the already-prepared statement. Rows are bound
+# through db.insert_values, which appends the VALUES tuples.
+_INSERT_FIX_SQL = """
+INSERT INTO fixtures (
+  fixture_id, commence_time_utc, matchweek, status, home_team, away_team,
+  home_goals, away_goals, last_updated_utc
+)
+"""
+
+# Unchanged fixtures are left alone: no page rewrite, no journal traffic.
+_FIX_CONFLICT_SQL = """
+ON CONFLICT(fixture_id) DO UPDATE SET
+  commence_time_utc=excluded.commence_time_utc,
+  matchweek=excluded.matchweek,
+  status=excluded.status,
+  home_team=excluded.home_team,
+  away_team=excluded.away_team,
+  home_goals=excluded.home_goals,
+  away_goals=excluded.away_goals,
+  last_updated_utc=excluded.last_updated_utc
+WHERE fixtures.commence_time_utc IS NOT excluded.commence_time_utc
+   OR fixtures.matchweek IS NOT excluded.matchweek
+   OR fixtures.status IS NOT excluded.status
+   OR fixtures.home_team IS NOT excluded.home_team
+   OR fixtures.away_team IS NOT excluded.away_team
+   OR fixtures.home_goals IS NOT excluded.home_goals
+   OR fixtures.away_goals IS NOT excluded.away_goals
+"""
+
+_INSERT_SNAP_SQL = """
+INSERT INTO odds_snapshots (
+  captured_at_utc, fixture_id, bookmaker, market, line, over_price, under_price
+)
+"""
+
+
+def _make_session() -> requests.Session:
+    # Transient 5xx are retried with backoff; raise_on_status=False hands the
+    # last response back so the callers' own status handling still applies.
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return session
+
+
+# One pooled session per process: keep-alive reuses the TCP+TLS connection
+# across the base odds call and every per-event call to the same host.
+_SESSION = _make_session()
+
 
 def _norm(s: str) -> str:
     return (s or "").strip().lower()
 
 
+# Club names differ between feeds ("Brighton & Hove Albion FC" vs
+# "Brighton and Hove Albion"). Tables/patterns are built once at import.
+_PUNCT_TBL = str.maketrans({c: " " for c in string.punctuation})
+_RE_CLUB_SUFFIX = re.compile(r"\b(?:fc|afc|cf|sc|sv|fk|sk)\b")
+
+
+def _norm_team(s: str) -> str:
+    s = _norm(s).replace("&", " and ").translate(_PUNCT_TBL)
+    return " ".join(_RE_CLUB_SUFFIX.sub(" ", s).split())
+
+
+def _as_float(x: Any) -> float | None:
+    """
+    Prices/points arrive from JSON as float or int already; only the rare
+    string value goes through float() parsing.
+    """
+    t = type(x)
+    if t is float:
+        return x
+    if t is int:
+        return float(x)
+    if t is str:
+        try:
+            return float(x)
+        except ValueError:
+            return None
+    return None
+
+
 def _dedupe_keep_order(items: list[str]) -> list[str]:
     out: list[str] = []
     seen: set[str] = set()
@@ -47,25 +155,82 @@ def sanitize_base_markets(markets: str) -> str:
     return ",".join(_dedupe_keep_order(keep))
 
 
-def fetch_pl_matches(fd_token: str, days_back: int, days_forward: int) -> dict[str, Any]:
+def _conditional_headers(validators: dict[str, Any] | None, params: dict[str, Any]) -> dict[str, str]:
+    """
+    If-None-Match / If-Modified-Since from a previous response, but only when
+    it was for the same query params.
+    """
+    v = validators or {}
+    if v.get("params") != params:
+        return {}
+
+    headers: dict[str, str] = {}
+    if v.get("etag"):
+        headers["If-None-Match"] = v["etag"]
+    if v.get("last_modified"):
+        headers["If-Modified-Since"] = v["last_modified"]
+    return headers
+
+
+def _validators_from(r: requests.Response, params: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "params": params,
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+    }
+
+
+def _load_meta_json(con, key: str) -> Any:
+    raw = get_meta(con, key)
+    if not raw:
+        return None
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return None
+
+
+def load_validators(con, key: str) -> dict[str, Any] | None:
+    return _load_meta_json(con, key)
+
+
+def save_validators(con, key: str, validators: dict[str, Any]) -> None:
+    set_meta(con, key, orjson.dumps(validators).decode())
+
+
+def _event_stubs(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Just what store_btts_snapshots reads from a base event
+    return [{k: ev.get(k) for k in ("id", "commence_time", "home_team", "away_team")} for ev in events]
+
+
+def fetch_pl_matches(
+    fd_token: str,
+    days_back: int,
+    days_forward: int,
+    validators: dict[str, Any] | None = None,
+) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+    """
+    Conditional GET. Returns (matches_json, validators); matches_json is None
+    when football-data answers 304 Not Modified for the same date window.
+    """
     today = datetime.now(timezone.utc).date()
     date_from = (today - timedelta(days=days_back)).isoformat()
     date_to = (today + timedelta(days=days_forward)).isoformat()
+    params = {"dateFrom": date_from, "dateTo": date_to}
 
-    r = requests.get(
+    r = _SESSION.get(
         f"{FOOTBALL_DATA_BASE}/competitions/PL/matches",
-        headers={"X-Auth-Token": fd_token},
-        params={"dateFrom": date_from, "dateTo": date_to},
+        headers={"X-Auth-Token": fd_token, **_conditional_headers(validators, params)},
+        params=params,
         timeout=30,
     )
+    if r.status_code == 304:
+        return None, validators
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content), _validators_from(r, params)
 
 
-def upsert_fixtures(con, matches_json: dict[str, Any]) -> int:
-    rows: list[tuple[Any, ...]] = []
-    now_iso = utcnow_iso()
-
+def _iter_fixture_rows(matches_json: dict[str, Any], now_iso: str) -> Iterator[tuple[Any, ...]]:
     for m in matches_json.get("matches", []):
         fixture_id = str(m["id"])
         commence = m.get("utcDate")
@@ -78,32 +243,17 @@ def upsert_fixtures(con, matches_json: dict[str, Any]) -> int:
         hg = full.get("home")
         ag = full.get("away")
 
-        rows.append((fixture_id, commence, matchday, status, home, away, hg, ag, now_iso))
+        yield (fixture_id, commence, matchday, status, home, away, hg, ag, now_iso)
 
-    if not rows:
-        return 0
 
-    executemany(
+def upsert_fixtures(con, matches_json: dict[str, Any], now_iso: str | None = None) -> int:
+    return insert_values(
         con,
-        """
-        INSERT INTO fixtures (
-          fixture_id, commence_time_utc, matchweek, status, home_team, away_team,
-          home_goals, away_goals, last_updated_utc
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(fixture_id) DO UPDATE SET
-          commence_time_utc=excluded.commence_time_utc,
-          matchweek=excluded.matchweek,
-          status=excluded.status,
-          home_team=excluded.home_team,
-          away_team=excluded.away_team,
-          home_goals=excluded.home_goals,
-          away_goals=excluded.away_goals,
-          last_updated_utc=excluded.last_updated_utc
-        """,
-        rows,
+        _INSERT_FIX_SQL,
+        _iter_fixture_rows(matches_json, now_iso or utcnow_iso()),
+        width=9,
+        sql_tail=_FIX_CONFLICT_SQL,
     )
-    return len(rows)
 
 
 def _debug_odds_response(tag: str, r: requests.Response) -> None:
@@ -134,23 +284,30 @@ def fetch_odds_base(
     markets: str,
     odds_format: str,
     date_format: str,
-) -> list[dict[str, Any]]:
+    validators: dict[str, Any] | None = None,
+) -> tuple[list[dict[str, Any]] | None, dict[str, Any] | None]:
     """
-    Base odds call. If out of usage credits, return [] and do NOT crash the workflow.
+    Base odds call. If out of usage credits, return ([], None) and do NOT crash
+    the workflow: None validators mark that nothing was fetched.
+    Conditional GET like fetch_pl_matches: events is None on 304 Not Modified.
     """
     markets_clean = sanitize_base_markets(markets)
-
-    r = requests.get(
+    # Validators are keyed on the query without apiKey, so the key never lands in the DB
+    params = {
+        "regions": regions,
+        "markets": markets_clean,
+        "oddsFormat": odds_format,
+        "dateFormat": date_format,
+    }
+
+    r = _SESSION.get(
         f"{ODDS_API_BASE}/sports/{sport_key}/odds",
-        params={
-            "apiKey": odds_key,
-            "regions": regions,
-            "markets": markets_clean,
-            "oddsFormat": odds_format,
-            "dateFormat": date_format,
-        },
+        headers=_conditional_headers(validators, params),
+        params={"apiKey": odds_key, **params},
         timeout=30,
     )
+    if r.status_code == 304:
+        return None, validators
 
     if r.status_code >= 400:
         _debug_odds_response("ODDS_BASE_FAIL", r)
@@ -159,15 +316,15 @@ def fetch_odds_base(
         # The Odds API returns:
         #   {"error_code":"OUT_OF_USAGE_CREDITS", ...}
         try:
-            j = r.json()
+            j = orjson.loads(r.content)
             if isinstance(j, dict) and j.get("error_code") == "OUT_OF_USAGE_CREDITS":
                 print("ODDS_BASE_SKIP out of usage credits, returning [] so workflow continues")
-                return []
+                return [], None
         except Exception:
             pass
 
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content), _validators_from(r, params)
 
 
 def fetch_event_odds(
@@ -182,7 +339,7 @@ def fetch_event_odds(
     """
     Event-only odds call (used for BTTS here). Non-fatal by design.
     """
-    r = requests.get(
+    r = _SESSION.get(
         f"{ODDS_API_BASE}/sports/{sport_key}/events/{event_id}/odds",
         params={
             "apiKey": odds_key,
@@ -199,80 +356,76 @@ def fetch_event_odds(
         return None
 
     try:
-        return r.json()
-    except Exception:
+        return orjson.loads(r.content)
+    except orjson.JSONDecodeError:
         print("ODDS_EVENT_JSON_FAIL", sport_key, event_id, markets)
         return None
 
 
-def _fixture_id_for_event(con, commence: str, home: str, away: str) -> str | None:
+def build_fixture_index(con) -> dict[tuple[str, str, str], str]:
     """
-    Match Odds API event to our fixtures table by (commence_time_utc, home, away).
-    Handles sqlite3.Row or tuple.
+    Map (commence_time_utc, home, away) -> fixture_id in one query, so Odds API
+    events are matched with dict lookups instead of a SELECT per event.
+    The Odds API only lists upcoming/in-play events, so older fixtures are pruned in SQL.
     """
-    cur = con.cursor()
-    got = cur.execute(
+    idx: dict[tuple[str, str, str], str] = {}
+    for fixture_id, commence, home, away in con.execute(
         """
-        SELECT fixture_id
+        SELECT fixture_id, commence_time_utc, home_team, away_team
         FROM fixtures
-        WHERE commence_time_utc = ?
-          AND lower(home_team) = ?
-          AND lower(away_team) = ?
-        LIMIT 1
-        """,
-        (commence, _norm(home), _norm(away)),
-    ).fetchone()
-
-    if not got:
-        return None
-
-    try:
-        return str(got["fixture_id"])  # sqlite3.Row
-    except Exception:
-        try:
-            return str(got[0])  # tuple fallback
-        except Exception:
-            return None
+        WHERE commence_time_utc >= date('now', '-3 day')
+        """
+    ):
+        idx[(commence, _norm_team(home), _norm_team(away))] = str(fixture_id)
+    return idx
 
 
 def btts_already_captured_today(con, fixture_id: str) -> bool:
     """
     True if we already wrote BTTS rows for this fixture today.
-    Uses captured_at_utc YYYY-MM-DD prefix.
+    captured_at_utc is ISO text, so "today" is a plain range on it:
+    SQLite seeks idx_odds_fixture_time (fixture_id, captured_at_utc) instead of
+    evaluating substr() on every snapshot of the fixture.
     """
-    today = datetime.now(timezone.utc).date().isoformat()
+    today = datetime.now(timezone.utc).date()
     row = con.execute(
         """
         SELECT 1
         FROM odds_snapshots
         WHERE fixture_id = ?
+          AND captured_at_utc >= ?
+          AND captured_at_utc < ?
           AND market = 'btts'
-          AND substr(captured_at_utc, 1, 10) = ?
         LIMIT 1
         """,
-        (fixture_id, today),
+        (fixture_id, today.isoformat(), (today + timedelta(days=1)).isoformat()),
     ).fetchone()
     return row is not None
 
 
-def _store_rows(con, rows: list[tuple[Any, ...]]) -> int:
-    if not rows:
-        return 0
+def _unique_snap_rows(rows: Iterable[tuple[Any, ...]]) -> Iterator[tuple[Any, ...]]:
+    """
+    Drop repeated (captured_at, fixture_id, bookmaker, market, line) rows,
+    e.g. a book listed under two regions. First one wins.
+    """
+    seen: set[tuple[Any, ...]] = set()
+    for row in rows:
+        key = row[:5]
+        if key in seen:
+            continue
+        seen.add(key)
+        yield row
 
-    executemany(
-        con,
-        """
-        INSERT INTO odds_snapshots (
-          captured_at_utc, fixture_id, bookmaker, market, line, over_price, under_price
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        rows,
-    )
-    return len(rows)
 
+def _store_rows(con, rows: Iterable[tuple[Any, ...]]) -> int:
+    return insert_values(con, _INSERT_SNAP_SQL, _unique_snap_rows(rows), width=7)
 
-def store_base_market_snapshots(con, events: list[dict[str, Any]], captured_at: str) -> int:
+
+def _iter_base_rows(
+    events: list[dict[str, Any]],
+    captured_at: str,
+    fixture_idx: dict[tuple[str, str, str], str],
+) -> Iterator[tuple[Any, ...]]:
     """
     Stores totals + spreads from /sports/{sport_key}/odds.
     totals:
@@ -283,8 +436,12 @@ def store_base_market_snapshots(con, events: list[dict[str, Any]], captured_at:
       line = HOME handicap (stored as float)
       over_price = Home price
       under_price = Away price
+    Rows are yielded so they are bound in batches as they are parsed.
     """
-    rows: list[tuple[Any, ...]] = []
+    # Hot loop: module globals bound to locals once
+    norm = _norm
+    as_float = _as_float
+    totals_sides = _TOTALS_SIDES
 
     for ev in events or []:
         commence = ev.get("commence_time")
@@ -293,10 +450,13 @@ def store_base_market_snapshots(con, events: list[dict[str, Any]], captured_at:
         if not (commence and home and away):
             continue
 
-        fixture_id = _fixture_id_for_event(con, commence, home, away)
+        fixture_id = fixture_idx.get((commence, _norm_team(home), _norm_team(away)))
         if not fixture_id:
             continue
 
+        # Spread outcomes are named after the teams: normalise them once per event
+        spread_sides = {norm(home): "home", norm(away): "away"}
+
         for bm in ev.get("bookmakers", []) or []:
             bm_title = bm.get("title") or bm.get("key") or "unknown_book"
 
@@ -304,52 +464,91 @@ def store_base_market_snapshots(con, events: list[dict[str, Any]], captured_at:
                 mkey = mk.get("key")
 
                 if mkey == "totals":
-                    by_line: dict[float, dict[str, float]] = {}
+                    # map line -> [over_price, under_price]
+                    by_line: dict[float, list[float | None]] = {}
                     for out in mk.get("outcomes", []) or []:
-                        point = out.get("point")
-                        name = _norm(out.get("name"))
-                        price = out.get("price")
-                        if point is None or price is None:
-                            continue
-                        try:
-                            ln = float(point)
-                            pr = float(price)
-                        except (TypeError, ValueError):
+                        get = out.get
+                        name = get("name")
+                        slot = totals_sides.get(name)
+                        if slot is None:
+                            slot = totals_sides.get(norm(name))
+                            if slot is None:
+                                continue
+                        ln = as_float(get("point"))
+                        pr = as_float(get("price"))
+                        if ln is None or pr is None:
                             continue
-                        if name not in ("over", "under"):
-                            continue
-                        by_line.setdefault(ln, {})[name] = pr
+                        ou = by_line.get(ln)
+                        if ou is None:
+                            ou = by_line[ln] = [None, None]
+                        ou[slot] = pr
 
-                    for ln, ou in by_line.items():
-                        if "over" in ou and "under" in ou:
-                            rows.append((captured_at, fixture_id, bm_title, "totals", ln, ou["over"], ou["under"]))
+                    for ln, (over_pr, under_pr) in by_line.items():
+                        if over_pr is not None and under_pr is not None:
+                            yield (captured_at, fixture_id, bm_title, "totals", ln, over_pr, under_pr)
 
                 elif mkey == "spreads":
                     # map line -> {home: price, away: price}
                     by_line: dict[float, dict[str, float]] = {}
                     for out in mk.get("outcomes", []) or []:
-                        point = out.get("point")
-                        name = out.get("name")
-                        price = out.get("price")
-                        if point is None or name is None or price is None:
+                        get = out.get
+                        name = get("name")
+                        side = spread_sides.get(norm(str(name))) if name is not None else None
+                        if side is None:
                             continue
-                        try:
-                            ln = float(point)
-                            pr = float(price)
-                        except (TypeError, ValueError):
+                        ln = as_float(get("point"))
+                        pr = as_float(get("price"))
+                        if ln is None or pr is None:
                             continue
-
-                        nm = _norm(str(name))
-                        if nm == _norm(home):
-                            by_line.setdefault(ln, {})["home"] = pr
-                        elif nm == _norm(away):
-                            by_line.setdefault(ln, {})["away"] = pr
+                        by_line.setdefault(ln, {})[side] = pr
 
                     for ln, vals in by_line.items():
                         if "home" in vals and "away" in vals:
-                            rows.append((captured_at, fixture_id, bm_title, "spreads", ln, vals["home"], vals["away"]))
+                            yield (captured_at, fixture_id, bm_title, "spreads", ln, vals["home"], vals["away"])
 
-    return _store_rows(con, rows)
+
+def latest_base_prices(
+    con, fixture_ids: Iterable[str]
+) -> dict[tuple[str, str, str, float], tuple[float | None, float | None]]:
+    """
+    (fixture_id, bookmaker, market, line) -> (over_price, under_price) of the
+    newest stored totals/spreads snapshot, for the given fixtures only.
+    SQLite fills bare columns from the MAX(captured_at_utc) row of each group.
+    """
+    ids = list(fixture_ids)
+    if not ids:
+        return {}
+
+    latest: dict[tuple[str, str, str, float], tuple[float | None, float | None]] = {}
+    for fixture_id, bookmaker, market, line, over_price, under_price, _ in con.execute(
+        f"""
+        SELECT fixture_id, bookmaker, market, line, over_price, under_price, MAX(captured_at_utc)
+        FROM odds_snapshots
+        WHERE fixture_id IN ({",".join("?" * len(ids))})
+          AND market IN ('totals', 'spreads')
+        GROUP BY fixture_id, bookmaker, market, line
+        """,
+        ids,
+    ):
+        latest[(fixture_id, bookmaker, market, line)] = (over_price, under_price)
+    return latest
+
+
+def store_base_market_snapshots(
+    con,
+    events: list[dict[str, Any]],
+    captured_at: str,
+    fixture_idx: dict[tuple[str, str, str], str] | None = None,
+) -> int:
+    """
+    Only prices that moved since the last stored snapshot of the same
+    (fixture, bookmaker, market, line) are written.
+    """
+    if fixture_idx is None:
+        fixture_idx = build_fixture_index(con)
+    latest = latest_base_prices(con, set(fixture_idx.values()))
+    rows = _iter_base_rows(events, captured_at, fixture_idx)
+    return _store_rows(con, (r for r in rows if latest.get(r[1:5]) != r[5:7]))
 
 
 def store_btts_snapshots(
@@ -358,6 +557,7 @@ def store_btts_snapshots(
     captured_at: str,
     settings,
     max_btts_events: int,
+    fixture_idx: dict[tuple[str, str, str], str] | None = None,
 ) -> int:
     """
     BTTS must be fetched per-event. To stop nuking credits:
@@ -372,6 +572,8 @@ def store_btts_snapshots(
     """
     rows: list[tuple[Any, ...]] = []
     now = datetime.now(timezone.utc)
+    if fixture_idx is None:
+        fixture_idx = build_fixture_index(con)
 
     # Filter to upcoming events only
     upcoming: list[dict[str, Any]] = []
@@ -391,6 +593,8 @@ def store_btts_snapshots(
     upcoming.sort(key=lambda e: e.get("commence_time") or "")
     upcoming = upcoming[: max(0, int(max_btts_events))]
 
+    # DB checks stay on this thread; only the HTTP calls fan out
+    todo: list[tuple[str, str]] = []
     for ev in upcoming:
         event_id = ev.get("id")
         commence = ev.get("commence_time")
@@ -399,7 +603,7 @@ def store_btts_snapshots(
         if not (event_id and commence and home and away):
             continue
 
-        fixture_id = _fixture_id_for_event(con, commence, home, away)
+        fixture_id = fixture_idx.get((commence, _norm_team(home), _norm_team(away)))
         if not fixture_id:
             continue
 
@@ -407,15 +611,28 @@ def store_btts_snapshots(
         if btts_already_captured_today(con, fixture_id):
             continue
 
-        payload = fetch_event_odds(
+        todo.append((fixture_id, str(event_id)))
+
+    if not todo:
+        return 0
+
+    def _fetch(event_id: str) -> dict[str, Any] | None:
+        return fetch_event_odds(
             odds_key=settings.odds_api_key,
             sport_key=settings.odds_sport_key,
-            event_id=str(event_id),
+            event_id=event_id,
             regions=settings.odds_regions,
             markets="btts",
             odds_format=settings.odds_format,
             date_format=settings.date_format,
         )
+
+    # Independent per-event calls: wall time is the slowest call, not the sum
+    # (capped at the session's per-host pool size)
+    with ThreadPoolExecutor(max_workers=min(len(todo), 8)) as ex:
+        payloads = list(ex.map(_fetch, [event_id for _, event_id in todo]))
+
+    for (fixture_id, _), payload in zip(todo, payloads):
         if not payload:
             continue
 
@@ -426,35 +643,105 @@ def store_btts_snapshots(
                 if mk.get("key") != "btts":
                     continue
 
-                yes_price = None
-                no_price = None
+                prices: dict[str, float] = {}
 
                 for out in mk.get("outcomes", []) or []:
-                    nm = _norm(out.get("name"))
-                    pr = out.get("price")
-                    if pr is None:
-                        continue
-                    try:
-                        prf = float(pr)
-                    except (TypeError, ValueError):
+                    side = _BTTS_SIDES.get(_norm(out.get("name")))
+                    pr = _as_float(out.get("price"))
+                    if side is None or pr is None:
                         continue
+                    prices[side] = pr
 
-                    if nm in ("yes", "y"):
-                        yes_price = prf
-                    elif nm in ("no", "n"):
-                        no_price = prf
-
+                yes_price = prices.get("yes")
+                no_price = prices.get("no")
                 if yes_price is not None and no_price is not None:
                     rows.append((captured_at, fixture_id, bm_title, "btts", 0.0, yes_price, no_price))
 
     return _store_rows(con, rows)
 
 
+def run(
+    con,
+    s,
+    days_back: int,
+    days_forward: int,
+    max_btts_events: int = 5,
+    keep_snapshots: int = 50000,
+) -> dict[str, int]:
+    """
+    One collection cycle on an already-open, initialised connection.
+    A long-lived driver can keep `con` (and the module's pooled HTTP session)
+    across cycles, so the schema and prepared statements are not redone each
+    time. main() is a single cycle.
+    """
+    fd_validators = load_validators(con, FD_MATCHES_META_KEY)
+    odds_validators = load_validators(con, ODDS_BASE_META_KEY)
+    # One timestamp per cycle, shared by fixture and snapshot rows
+    captured_at = utcnow_iso()
+
+    # Both fetches are network-bound and independent: overlap them.
+    # The DB is only touched from this thread, after both return.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        fut_fd = ex.submit(
+            fetch_pl_matches, s.football_data_token, days_back, days_forward, validators=fd_validators
+        )
+        fut_odds = ex.submit(
+            fetch_odds_base,
+            odds_key=s.odds_api_key,
+            sport_key=s.odds_sport_key,
+            regions=s.odds_regions,
+            markets=s.odds_markets,
+            odds_format=s.odds_format,
+            date_format=s.date_format,
+            validators=odds_validators,
+        )
+        matches, fd_validators = fut_fd.result()
+        base_events, odds_validators = fut_odds.result()
+
+    if matches is None:
+        # 304: fixture window unchanged since the last run
+        n_fix = 0
+    else:
+        n_fix = upsert_fixtures(con, matches, captured_at)
+        save_validators(con, FD_MATCHES_META_KEY, fd_validators)
+
+    # Built once, after the fixture upsert, and shared by both odds passes
+    fixture_idx = build_fixture_index(con)
+
+    if base_events is None:
+        # 304: no price moved, so there is nothing to snapshot. BTTS is
+        # independent of that: its candidates come from the last 200's events.
+        n_base = 0
+        base_events = _load_meta_json(con, ODDS_EVENTS_META_KEY) or []
+    elif odds_validators is None:
+        # Out of credits: nothing was fetched. Keep the saved validators and
+        # BTTS candidates so the next 304 still has events to work from.
+        n_base = 0
+    else:
+        n_base = store_base_market_snapshots(con, base_events, captured_at, fixture_idx)
+        save_validators(con, ODDS_BASE_META_KEY, odds_validators)
+        set_meta(con, ODDS_EVENTS_META_KEY, orjson.dumps(_event_stubs(base_events)).decode())
+
+    # BTTS is optional and tightly rate-limited
+    n_btts = store_btts_snapshots(
+        con, base_events, captured_at, s, max_btts_events=max_btts_events, fixture_idx=fixture_idx
+    )
+
+    # Retention runs in its own transaction, and only every PRUNE_EVERY_N_RUNS
+    # runs: the keep window is generous, so amortising the delete is safe.
+    runs = int(get_meta(con, RUNS_META_KEY) or 0) + 1
+    set_meta(con, RUNS_META_KEY, str(runs))
+    n_pruned = prune_snapshots(con, keep_snapshots) if runs % PRUNE_EVERY_N_RUNS == 0 else 0
+
+    return {"fixtures": n_fix, "base": n_base, "btts": n_btts, "pruned": n_pruned}
+
+
 def main() -> None:
     p = argparse.ArgumentParser()
     p.add_argument("--days-back", type=int, default=None)
     p.add_argument("--days-forward", type=int, default=None)
     p.add_argument("--max-btts-events", type=int, default=5)
+    p.add_argument("--keep-snapshots", type=int, default=50000)
     args = p.parse_args()
 
     s = get_settings()
@@ -465,30 +752,21 @@ def main() -> None:
     con = connect(s.db_path)
     init_db(con)
 
-    matches = fetch_pl_matches(s.football_data_token, days_back, days_forward)
-    n_fix = upsert_fixtures(con, matches)
-
-    captured_at = utcnow_iso()
-
-    base_events = fetch_odds_base(
-        odds_key=s.odds_api_key,
-        sport_key=s.odds_sport_key,
-        regions=s.odds_regions,
-        markets=s.odds_markets,
-        odds_format=s.odds_format,
-        date_format=s.date_format,
+    counts = run(
+        con,
+        s,
+        days_back,
+        days_forward,
+        max_btts_events=args.max_btts_events,
+        keep_snapshots=args.keep_snapshots,
     )
 
-    n_base = store_base_market_snapshots(con, base_events, captured_at)
-
-    # BTTS is optional and tightly rate-limited
-    n_btts = store_btts_snapshots(con, base_events, captured_at, s, max_btts_events=args.max_btts_events)
-
-    con.close()
+    close(con)
 
-    print(f"Upserted fixtures: {n_fix}")
-    print(f"Stored base odds snapshots: {n_base}")
-    print(f"Stored BTTS snapshots: {n_btts}")
+    print(f"Upserted fixtures (new or changed): {counts['fixtures']}")
+    print(f"Stored base odds snapshots: {counts['base']}")
+    print(f"Stored BTTS snapshots: {counts['btts']}")
+    print(f"Pruned old snapshots: {counts['pruned']}")
     print(f"Base markets used: {sanitize_base_markets(s.odds_markets)}")
     print(f"Max BTTS events this run: {args.max_btts_events}")
 
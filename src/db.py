@@ -1,8 +1,18 @@
 from __future__ import annotations
 
 import sqlite3
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain, islice
 from pathlib import Path
-from typing import Iterable, Mapping, Any
+from typing import Iterable, Iterator, Sequence, Any
+
+# Bind variables per multi-row INSERT. Stays under the pre-3.32 limit of 999,
+# and keeps each prepared statement small enough to be cheap to compile.
+MAX_BIND_VARS = 900
+
+# Rows per write transaction: one commit per batch, bounded WAL growth
+TXN_ROWS = 10_000
 
 
 def connect(db_path: str) -> sqlite3.Connection:
@@ -12,38 +22,218 @@ def connect(db_path: str) -> sqlite3.Connection:
 
     con = sqlite3.connect(str(p))
     con.execute("PRAGMA foreign_keys = ON;")
+
+    # WAL: commits append to the log instead of rewriting pages + fsync per commit,
+    # and the exporter can read while collect writes. NORMAL is durable enough in WAL.
+    mode = con.execute("PRAGMA journal_mode = WAL;").fetchone()[0]
+    if str(mode).lower() != "wal":
+        print("DB_WAL_UNAVAILABLE", mode)
+    con.execute("PRAGMA synchronous = NORMAL;")
+    con.execute("PRAGMA temp_store = MEMORY;")
+    con.execute("PRAGMA cache_size = -65536;")  # 64MB
+    con.execute("PRAGMA mmap_size = 268435456;")  # 256MB
     return con
 
 
+def close(con: sqlite3.Connection) -> None:
+    """
+    Close after a write run. PRAGMA optimize re-analyzes only tables whose
+    planner stats went stale, and the WAL (if any) is folded back into the
+    DB file and truncated so the committed app.db is self-contained.
+    """
+    con.commit()
+    con.execute("PRAGMA optimize")
+    con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    con.close()
+
+
+# Bump whenever the DDL in init_db changes, so existing DBs pick it up
+SCHEMA_VERSION = 2
+
+
 def init_db(con: sqlite3.Connection) -> None:
+    """
+    Idempotent schema setup. A DB already stamped with SCHEMA_VERSION (in
+    PRAGMA user_version) returns after one header read, without running DDL.
+    """
+    if con.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        return
+
     con.executescript(
         """
-        CREATE TABLE IF NOT EXISTS odds (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            captured_at_utc TEXT NOT NULL,
-            fixture_id TEXT,
-            commence_time_utc TEXT,
-            status TEXT,
-            home_team TEXT,
-            away_team TEXT,
-            bookmaker TEXT,
-            market TEXT,
-            line REAL,
-            over_price REAL,
-            under_price REAL
+        CREATE TABLE IF NOT EXISTS fixtures (
+          fixture_id TEXT PRIMARY KEY,
+          commence_time_utc TEXT NOT NULL,
+          matchweek INTEGER,
+          status TEXT NOT NULL,
+          home_team TEXT NOT NULL,
+          away_team TEXT NOT NULL,
+          home_goals INTEGER,
+          away_goals INTEGER,
+          last_updated_utc TEXT
         );
 
-        CREATE INDEX IF NOT EXISTS idx_odds_fixture_market_time
-            ON odds (fixture_id, market, captured_at_utc);
+        CREATE TABLE IF NOT EXISTS odds_snapshots (
+          snapshot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+          captured_at_utc TEXT NOT NULL,
+          fixture_id TEXT NOT NULL,
+          bookmaker TEXT NOT NULL,
+          market TEXT NOT NULL,
+          line REAL NOT NULL,
+          over_price REAL,
+          under_price REAL,
+          FOREIGN KEY (fixture_id) REFERENCES fixtures(fixture_id)
+        );
+
+        -- Upcoming-fixture window for the odds -> fixture index
+        CREATE INDEX IF NOT EXISTS ix_fix_commence
+            ON fixtures (commence_time_utc);
+
+        CREATE INDEX IF NOT EXISTS idx_odds_fixture_time
+            ON odds_snapshots (fixture_id, captured_at_utc);
+
+        -- Latest price per (fixture, bookmaker, market, line): the collector's
+        -- unchanged-price check and the latest-odds export walk this in GROUP BY
+        -- order, no temp b-tree; the export's join-back is one seek on it.
+        CREATE INDEX IF NOT EXISTS idx_odds_latest
+            ON odds_snapshots (fixture_id, bookmaker, market, line, captured_at_utc DESC);
+
+        -- Newest-first scans (retention cutoff, export top-K) in ORDER BY order,
+        -- without a sort. Kept narrow: every collect insert pays for it, and
+        -- the top-K readers only fetch a bounded number of table rows.
+        -- Supersedes ix_snap_captured and the wide idx_snap_export.
+        DROP INDEX IF EXISTS ix_snap_captured;
+        DROP INDEX IF EXISTS idx_snap_export;
+        CREATE INDEX IF NOT EXISTS idx_snap_recent
+            ON odds_snapshots (captured_at_utc DESC, snapshot_id);
+
+        -- Small key/value store for run-to-run state (HTTP validators etc.)
+        CREATE TABLE IF NOT EXISTS meta (
+          key TEXT PRIMARY KEY,
+          value TEXT
+        );
         """
     )
+    con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    con.commit()
+
+
+@contextmanager
+def transaction(con: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    Explicit BEGIN IMMEDIATE ... COMMIT (rollback on error): takes the write
+    lock up front and makes the batch one commit instead of leaning on
+    sqlite3's implicit transaction handling.
+    If the caller already has a transaction open, nest as a SAVEPOINT instead:
+    an error undoes only this block, and committing stays with the caller.
+    """
+    if con.in_transaction:
+        con.execute("SAVEPOINT txn")
+        try:
+            yield con
+        except BaseException:
+            con.execute("ROLLBACK TO txn")
+            con.execute("RELEASE txn")
+            raise
+        con.execute("RELEASE txn")
+        return
+
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        yield con
+    except BaseException:
+        con.rollback()
+        raise
     con.commit()
 
 
-def executemany(
+@lru_cache(maxsize=32)
+def _values_sql(sql_head: str, width: int, n_rows: int, sql_tail: str) -> str:
+    # Full chunks all share one text, so sqlite3's statement cache reuses the prepare
+    placeholder = "(" + ",".join("?" * width) + ")"
+    return f"{sql_head} VALUES {','.join([placeholder] * n_rows)} {sql_tail}"
+
+
+def insert_values(
     con: sqlite3.Connection,
-    sql: str,
-    rows: Iterable[Mapping[str, Any]],
-) -> None:
-    con.executemany(sql, list(rows))
+    sql_head: str,
+    rows: Iterable[Sequence[Any]],
+    width: int,
+    sql_tail: str = "",
+) -> int:
+    """
+    Multi-row INSERT: binds as many rows per statement as the variable limit
+    allows, i.e. `{sql_head} VALUES (?,..),(?,..),... {sql_tail}`.
+    sql_head is everything before VALUES, sql_tail e.g. an ON CONFLICT clause.
+    Every row must have exactly `width` values. Returns rows actually written,
+    so upserts whose DO UPDATE ... WHERE filters a row out don't count.
+    """
+    per_stmt = max(1, MAX_BIND_VARS // width)
+
+    it = iter(rows)
+    before = con.total_changes
+    while True:
+        batch = list(islice(it, TXN_ROWS))
+        if not batch:
+            break
+        with transaction(con):
+            for i in range(0, len(batch), per_stmt):
+                chunk = batch[i : i + per_stmt]
+                sql = _values_sql(sql_head, width, len(chunk), sql_tail)
+                con.execute(sql, list(chain.from_iterable(chunk)))
+
+    return con.total_changes - before
+
+
+def get_meta(con: sqlite3.Connection, key: str) -> str | None:
+    row = con.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_meta(con: sqlite3.Connection, key: str, value: str) -> None:
+    con.execute(
+        """
+        INSERT INTO meta (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value=excluded.value
+        """,
+        (key, value),
+    )
+    con.commit()
+
+
+def prune_snapshots(con: sqlite3.Connection, keep: int) -> int:
+    """
+    Keep roughly the newest `keep` odds snapshots, but never the newest row
+    of a (fixture, bookmaker, market, line): unchanged prices are not
+    re-written, so that row can be arbitrarily old and is still the current
+    price. Only older rows that a newer one has replaced are deleted.
+    The cutoff timestamp is read once off idx_snap_recent and the
+    replaced-check is a seek on idx_odds_latest. Rows tied with the cutoff
+    survive.
+    """
+    if keep <= 0:
+        return 0
+
+    cur = con.execute(
+        """
+        DELETE FROM odds_snapshots AS o
+        WHERE o.captured_at_utc < (
+          SELECT captured_at_utc
+          FROM odds_snapshots
+          ORDER BY captured_at_utc DESC
+          LIMIT 1 OFFSET ?
+        )
+          AND EXISTS (
+            SELECT 1
+            FROM odds_snapshots n
+            WHERE n.fixture_id = o.fixture_id
+              AND n.bookmaker = o.bookmaker
+              AND n.market = o.market
+              AND n.line = o.line
+              AND n.captured_at_utc > o.captured_at_utc
+          )
+        """,
+        (keep,),
+    )
     con.commit()
+    return cur.rowcount
@@ -1,98 +1,446 @@
 from __future__ import annotations
 
 import argparse
-import json
+import gzip
+import hashlib
+import os
 import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
+
+import orjson
 
 
 def connect(db_path: str) -> sqlite3.Connection:
-    con = sqlite3.connect(db_path)
-    con.row_factory = sqlite3.Row  # <-- CRITICAL FIX
+    # Reads only: opened read-only (no write locks, no journal setup), in
+    # autocommit mode, and query_only makes any stray write fail
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    con = sqlite3.connect(uri, uri=True, isolation_level=None)
+    # No sqlite3.Row factory: every export reads plain tuples by position and
+    # names its keys once from cursor.description
+    con.execute("PRAGMA query_only = 1;")
+
+    # Per-connection: keep the export's GROUP BY / ORDER BY temp b-trees in RAM
+    con.execute("PRAGMA temp_store = MEMORY;")
+    con.execute("PRAGMA cache_size = -131072;")  # 128MB
+    con.execute("PRAGMA mmap_size = 1073741824;")  # 1GB
     return con
 
 
-def export_odds_json(db_path: str, out_path: str, limit: int | None) -> int:
-    con = connect(db_path)
-    cur = con.cursor()
+# Newest `limit` snapshots, laid out fixture by fixture (fixtures ordered by
+# their newest snapshot) so the writer can group with one linear pass.
+# Column order matters: [0:4] fixture, [4] market, [5:10] snapshot entry.
+_EXPORT_SQL = """
+WITH recent AS (
+  SELECT
+    f.fixture_id,
+    f.commence_time_utc,
+    f.home_team,
+    f.away_team,
+    o.market,
+    o.bookmaker,
+    o.line,
+    o.over_price,
+    o.under_price,
+    o.captured_at_utc,
+    o.snapshot_id
+  FROM odds_snapshots o
+  JOIN fixtures f ON f.fixture_id = o.fixture_id
+  ORDER BY o.captured_at_utc DESC, o.snapshot_id
+  LIMIT ?
+)
+SELECT r.*
+FROM recent r
+JOIN (
+  SELECT fixture_id, MAX(captured_at_utc) AS latest_utc
+  FROM recent
+  GROUP BY fixture_id
+) l ON l.fixture_id = r.fixture_id
+ORDER BY l.latest_utc DESC, r.fixture_id, r.captured_at_utc DESC, r.snapshot_id
+"""
 
-    sql = """
-    SELECT
-      f.fixture_id,
-      f.commence_time_utc,
-      f.home_team,
-      f.away_team,
-      o.market,
-      o.line,
-      o.bookmaker,
-      o.over_price,
-      o.under_price,
-      o.captured_at_utc
-    FROM odds_snapshots o
-    JOIN fixtures f ON f.fixture_id = o.fixture_id
-    ORDER BY o.captured_at_utc DESC
-    """
+# Site feed: newest price per (fixture, bookmaker, market, line). The grouped
+# MAX(captured_at_utc) is index-only on idx_odds_latest and each key joins back
+# with one seek on the same index. A key has at most one row per captured_at
+# (collect drops repeated rows before insert).
+_LATEST_ODDS_SQL = """
+SELECT
+  o.captured_at_utc,
+  f.fixture_id,
+  f.commence_time_utc,
+  f.matchweek,
+  f.status,
+  f.home_team,
+  f.away_team,
+  f.home_goals,
+  f.away_goals,
+  o.bookmaker,
+  o.market,
+  o.line,
+  o.over_price,
+  o.under_price
+FROM (
+  SELECT fixture_id, bookmaker, market, line, MAX(captured_at_utc) AS captured_at_utc
+  FROM odds_snapshots
+  GROUP BY fixture_id, bookmaker, market, line
+) l
+JOIN odds_snapshots o
+  ON o.fixture_id = l.fixture_id
+ AND o.bookmaker = l.bookmaker
+ AND o.market = l.market
+ AND o.line = l.line
+ AND o.captured_at_utc = l.captured_at_utc
+JOIN fixtures f ON f.fixture_id = o.fixture_id
+ORDER BY f.commence_time_utc, f.fixture_id, o.market, o.bookmaker, o.line
+"""
+
+# Latest ? fixtures by kick-off (in kick-off order), each joined to its share
+# of the newest ? raw snapshots. Column order matters: [0:9] fixture,
+# [9:] snapshot entry (all NULL when the fixture has none).
+_FIXTURE_ODDS_SQL = """
+WITH fx AS (
+  SELECT
+    fixture_id, commence_time_utc, matchweek, status, home_team, away_team,
+    home_goals, away_goals, last_updated_utc
+  FROM fixtures
+  ORDER BY commence_time_utc DESC
+  LIMIT ?
+),
+snap AS (
+  SELECT
+    snapshot_id, captured_at_utc, fixture_id, bookmaker, market, line,
+    over_price, under_price
+  FROM odds_snapshots
+  ORDER BY captured_at_utc DESC, snapshot_id
+  LIMIT ?
+)
+SELECT
+  fx.*,
+  s.snapshot_id, s.captured_at_utc, s.bookmaker, s.market, s.line,
+  s.over_price, s.under_price
+FROM fx
+LEFT JOIN snap s ON s.fixture_id = fx.fixture_id
+ORDER BY fx.commence_time_utc, fx.fixture_id, s.captured_at_utc DESC, s.snapshot_id
+"""
+
+
+def _iter_rows(cur: sqlite3.Cursor) -> Iterator[tuple[Any, ...]]:
+    # fetchmany pulls cur.arraysize rows per call instead of one step per row
+    while True:
+        batch = cur.fetchmany()
+        if not batch:
+            return
+        yield from batch
+
+
+def _iter_fixtures(cur: sqlite3.Cursor) -> Iterator[dict[str, Any]]:
+    # Key names come from the cursor once; rows are then picked positionally
+    cols = [d[0] for d in cur.description]
+    fixture_cols = cols[0:4]
+    entry_cols = cols[5:10]
+    entry_vals = itemgetter(5, 6, 7, 8, 9)
+
+    for _, group in groupby(_iter_rows(cur), key=itemgetter(0)):
+        fixture: dict[str, Any] | None = None
+        for r in group:
+            if fixture is None:
+                fixture = dict(zip(fixture_cols, r[0:4]))
+                markets = fixture["markets"] = {}
+            entries = markets.get(r[4])
+            if entries is None:
+                entries = markets[r[4]] = []
+            entries.append(dict(zip(entry_cols, entry_vals(r))))
+        if fixture is not None:
+            yield fixture
+
+
+def _iter_dicts(cur: sqlite3.Cursor) -> Iterator[dict[str, Any]]:
+    keys = tuple(d[0] for d in cur.description)
+    for r in _iter_rows(cur):
+        yield dict(zip(keys, r))
+
+
+Write = Callable[[bytes], None]
 
-    if limit:
-        sql += " LIMIT ?"
-        rows = cur.execute(sql, (limit,)).fetchall()
+
+def _write_fixtures(cur: sqlite3.Cursor, write: Write, pretty: bool, now: datetime) -> int:
+    """
+    {"fixtures": [...]} streamed one fixture at a time, so only a single
+    fixture's snapshots are held in memory.
+    """
+    n = 0
+    if pretty:
+        write(b'{\n  "fixtures": [')
+        sep = b"\n    "
+        for fixture in _iter_fixtures(cur):
+            n += sum(len(v) for v in fixture["markets"].values())
+            # Re-indent so the streamed document matches a whole-payload OPT_INDENT_2 dump
+            write(sep + orjson.dumps(fixture, option=orjson.OPT_INDENT_2).replace(b"\n", b"\n    "))
+            sep = b",\n    "
+        write(b"\n  ]\n}" if n else b"]\n}")
     else:
-        rows = cur.execute(sql).fetchall()
-
-    # Build structured output
-    out: dict[str, Any] = {"fixtures": []}
-    by_fixture: dict[str, dict[str, Any]] = {}
-
-    for r in rows:
-        fid = r["fixture_id"]
-
-        if fid not in by_fixture:
-            by_fixture[fid] = {
-                "fixture_id": fid,
-                "commence_time_utc": r["commence_time_utc"],
-                "home_team": r["home_team"],
-                "away_team": r["away_team"],
-                "markets": {},
-            }
-
-        mk = r["market"]
-        market_bucket = by_fixture[fid]["markets"].setdefault(mk, [])
-
-        market_bucket.append(
-            {
-                "bookmaker": r["bookmaker"],
-                "line": r["line"],
-                "over_price": r["over_price"],
-                "under_price": r["under_price"],
-                "captured_at_utc": r["captured_at_utc"],
-            }
-        )
+        write(b'{"fixtures":[')
+        sep = b""
+        for fixture in _iter_fixtures(cur):
+            n += sum(len(v) for v in fixture["markets"].values())
+            write(sep + orjson.dumps(fixture))
+            sep = b","
+        write(b"]}")
+    return n
+
+
+def _write_items(cur: sqlite3.Cursor, write: Write, pretty: bool, now: datetime) -> int:
+    # {generated_at_utc, count, items} as read by site/public/index.html
+    items = list(_iter_dicts(cur))
+    # orjson writes the datetime itself (RFC 3339, "Z" with OPT_UTC_Z)
+    payload = {"generated_at_utc": now, "count": len(items), "items": items}
+    write(orjson.dumps(payload, option=orjson.OPT_UTC_Z | (orjson.OPT_INDENT_2 if pretty else 0)))
+    return len(items)
+
+
+def _write_fixture_odds(cur: sqlite3.Cursor, write: Write, pretty: bool, now: datetime) -> int:
+    """
+    [{...fixture, "odds": [...]}] from one ordered JOIN: a single groupby pass,
+    so consumers get odds in context without joining two files themselves.
+    """
+    cols = [d[0] for d in cur.description]
+    fixture_cols = cols[0:9]
+    entry_cols = cols[9:]
+
+    fixtures: list[dict[str, Any]] = []
+    for _, group in groupby(_iter_rows(cur), key=itemgetter(0)):
+        fixture: dict[str, Any] | None = None
+        for r in group:
+            if fixture is None:
+                fixture = dict(zip(fixture_cols, r[0:9]))
+                odds = fixture["odds"] = []
+                fixtures.append(fixture)
+            if r[9] is not None:
+                odds.append(dict(zip(entry_cols, r[9:])))
+    write(orjson.dumps(fixtures, option=orjson.OPT_INDENT_2 if pretty else 0))
+    return len(fixtures)
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    name: str
+    sql: str
+    out_path: str
+    write: Callable[[sqlite3.Cursor, Write, bool, datetime], int]
+    params: tuple[Any, ...] = ()  # bound to sql's placeholders; LIMIT -1 = no limit
+
+
+# What `python -m src.export` publishes for the site
+EXPORTS: tuple[ExportSpec, ...] = (
+    ExportSpec("odds", _LATEST_ODDS_SQL, "site/public/odds.json", _write_items),
+    ExportSpec(
+        "fixtures",
+        _FIXTURE_ODDS_SQL,
+        "site/public/data/fixtures.json",
+        _write_fixture_odds,
+        params=(200, 500),  # (fixtures, snapshots)
+    ),
+)
 
-    out["fixtures"] = list(by_fixture.values())
+_WRITE_BUFFER = 1 << 20
+
+# What the exports read, as an O(1)-ish probe: snapshot ids only grow
+# (AUTOINCREMENT), the fixture upsert bumps last_updated_utc on any change,
+# and the counts catch inserts and retention deletes.
+_SOURCE_STAMP_SQL = """
+SELECT
+  (SELECT MAX(snapshot_id) FROM odds_snapshots),
+  (SELECT COUNT(*) FROM odds_snapshots),
+  (SELECT MAX(last_updated_utc) FROM fixtures),
+  (SELECT COUNT(*) FROM fixtures)
+"""
+
+
+# Bump when a writer's output layout changes without its SQL changing, so
+# the next run rewrites outputs whose stamps would otherwise still match.
+_STAMP_VERSION = 1
+
+
+def _source_stamp(con: sqlite3.Connection, spec: ExportSpec, pretty: bool) -> str:
+    # PRAGMA data_version only compares within one connection, so it cannot
+    # carry over to the next run; this stamp can. Everything that shapes the
+    # output is part of it: the data probe, the query, the writer and options.
+    sql_hash = hashlib.sha1(spec.sql.encode()).hexdigest()
+    return orjson.dumps(
+        [
+            con.execute(_SOURCE_STAMP_SQL).fetchone(),
+            _STAMP_VERSION,
+            spec.name,
+            sql_hash,
+            spec.write.__qualname__,
+            spec.params,
+            pretty,
+        ]
+    ).decode()
+
+
+def _stamps_path(db_path: str) -> Path:
+    # Next to the DB (data/), not in the public web root, and committed with it
+    return Path(db_path).with_name("export_stamps.json")
+
+
+def _load_stamps(path: Path) -> dict[str, str]:
+    try:
+        return orjson.loads(path.read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return {}
+
+
+def _save_stamps(path: Path, stamps: dict[str, str]) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(orjson.dumps(stamps, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+    os.replace(tmp_path, path)
+
+
+def run_export(
+    con: sqlite3.Connection,
+    spec: ExportSpec,
+    pretty: bool = False,
+    now: datetime | None = None,
+    force: bool = False,
+    stamps: dict[str, str] | None = None,
+) -> int | None:
+    """
+    Runs spec.sql on an open connection and writes spec.out_path, plus a gzip
+    copy at out_path + ".gz". Both are built under a .tmp name and swapped in
+    with os.replace, so readers only ever see a complete file.
+    Output is compact JSON; pretty=True gives the indented layout for reading
+    by hand. `now` is the run's timestamp, shared by every spec of one run.
+    With `stamps` (out_path -> stamp, see _load_stamps), returns None and
+    leaves the outputs untouched when nothing they depend on has changed since
+    they were written, and records the new stamp otherwise; force=True always
+    rewrites. Returns rows exported.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+
+    out_path = spec.out_path
+    gz_path = out_path + ".gz"
+    stamp = None
+    if stamps is not None:
+        stamp = _source_stamp(con, spec, pretty)
+        if not force and stamps.get(out_path) == stamp and os.path.exists(out_path) and os.path.exists(gz_path):
+            return None
+
+    cur = con.cursor()
+    cur.arraysize = 1000
+    cur.execute(spec.sql, spec.params)
 
     Path(out_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(out, f, indent=2)
+    tmp_path, tmp_gz_path = out_path + ".tmp", gz_path + ".tmp"
+    try:
+        # Streamed chunks are small: a 1MB buffer turns them into a few large
+        # write() syscalls. mtime=0 keeps the .gz byte-identical when the JSON
+        # has not changed.
+        with (
+            open(tmp_path, "wb", buffering=_WRITE_BUFFER) as f,
+            open(tmp_gz_path, "wb", buffering=_WRITE_BUFFER) as gz_raw,
+        ):
+            with gzip.GzipFile(Path(out_path).name, "wb", compresslevel=6, fileobj=gz_raw, mtime=0) as gz:
+
+                def write(chunk: bytes) -> None:
+                    f.write(chunk)
+                    gz.write(chunk)
+
+                n = spec.write(cur, write, pretty, now)
+
+            # One flush + fsync per file, after the last byte and before the
+            # rename: a crash can then never leave a renamed-but-empty output.
+            for fh in (f, gz_raw):
+                fh.flush()
+                os.fsync(fh.fileno())
+
+        os.replace(tmp_path, out_path)
+        os.replace(tmp_gz_path, gz_path)
+        # Only after both renames: a crash in between just means one extra export
+        if stamps is not None:
+            stamps[out_path] = stamp
+    finally:
+        cur.close()
+        for path in (tmp_path, tmp_gz_path):
+            if os.path.exists(path):
+                os.remove(path)
+    return n
 
-    con.close()
-    return len(rows)
+
+def export_odds_json(
+    db_path: str,
+    out_path: str,
+    limit: int | None,
+    pretty: bool = False,
+    force: bool = False,
+) -> int | None:
+    """
+    Newest `limit` snapshots grouped by fixture as {"fixtures": [...]}.
+    None if skipped as unchanged (see run_export).
+    """
+    path = _stamps_path(db_path)
+    stamps = _load_stamps(path)
+    con = connect(db_path)
+    try:
+        spec = ExportSpec("odds_history", _EXPORT_SQL, out_path, _write_fixtures, params=(limit or -1,))
+        n = run_export(con, spec, pretty, force=force, stamps=stamps)
+    finally:
+        con.close()
+    if n is not None:
+        _save_stamps(path, stamps)
+    return n
 
 
 def main() -> None:
     p = argparse.ArgumentParser()
-    p.add_argument("--db-path", required=True)
-    p.add_argument("--out-path", required=True)
+    p.add_argument("--db-path", default=os.getenv("DB_PATH", "data/app.db"))
+    # With --out-path, write only the grouped snapshot history there (--limit
+    # applies to it); without, publish every EXPORTS spec on one connection.
+    p.add_argument("--out-path", default=None)
     p.add_argument("--limit", type=int, default=None)
+    # EXPORT_PRETTY=1 turns indenting on for a whole deploy without changing the command
+    p.add_argument(
+        "--pretty",
+        action="store_true",
+        default=os.getenv("EXPORT_PRETTY", "").strip().lower() in ("1", "true", "yes"),
+    )
+    p.add_argument("--force", action="store_true")
     args = p.parse_args()
 
-    n = export_odds_json(
-        db_path=args.db_path,
-        out_path=args.out_path,
-        limit=args.limit,
-    )
+    if args.out_path:
+        n = export_odds_json(
+            db_path=args.db_path,
+            out_path=args.out_path,
+            limit=args.limit,
+            pretty=args.pretty,
+            force=args.force,
+        )
+        if n is None:
+            print(f"[export] no change, skipping {args.out_path}")
+        else:
+            print(f"Exported {n} odds rows to {args.out_path}")
+        return
 
-    print(f"Exported {n} odds rows to {args.out_path}")
+    path = _stamps_path(args.db_path)
+    stamps = _load_stamps(path)
+    con = connect(args.db_path)
+    now = datetime.now(timezone.utc)
+    try:
+        for spec in EXPORTS:
+            n = run_export(con, spec, pretty=args.pretty, now=now, force=args.force, stamps=stamps)
+            if n is None:
+                print(f"[export] no change, skipping {spec.out_path}")
+            else:
+                print(f"Exported {n} {spec.name} rows to {spec.out_path}")
+    finally:
+        con.close()
+        # Also after a failed spec: the ones before it were written and stamped
+        _save_stamps(path, stamps)
 
 
 if __name__ == "__main__":
@@ -1,26 +1,25 @@
 from __future__ import annotations
 
-import numpy as np
-from scipy.stats import poisson
+import math
+
 from src.db import connect
 
 
 def main() -> None:
     con = connect("data/app.db")
-    rows = con.execute("""
-        SELECT home_goals, away_goals
+    # Mean goals per finished match, aggregated in SQLite (NULL when none)
+    lam = con.execute("""
+        SELECT AVG(CAST(home_goals AS REAL) + away_goals)
         FROM fixtures
         WHERE home_goals IS NOT NULL
-    """).fetchall()
+    """).fetchone()[0]
 
-    if not rows:
+    if lam is None:
         print("No finished matches yet")
         return
 
-    totals = [r["home_goals"] + r["away_goals"] for r in rows]
-    lam = np.mean(totals)
-
-    p_over_2_5 = 1 - poisson.cdf(2, lam)
+    # Poisson(lam): P(X <= 2) = e^-lam * (1 + lam + lam^2 / 2)
+    p_over_2_5 = 1.0 - math.exp(-lam) * (1.0 + lam + 0.5 * lam * lam)
     print(f"League implied P(Over 2.5): {p_over_2_5:.3f}")
 
 
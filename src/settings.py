@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 
 
 def _get_env(name: str, default: str = "") -> str:
@@ -26,7 +27,9 @@ class Settings:
     days_forward: int
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    # Read once per process; Settings is frozen, so sharing it is safe
     fd = _get_env("FOOTBALL_DATA_TOKEN")
     oa = _get_env("ODDS_API_KEY")
 
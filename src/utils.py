@@ -5,7 +5,8 @@ from typing import Optional, Tuple
 
 
 def utcnow_iso() -> str:
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    # One strftime call; same text as isoformat() with seconds precision and "Z"
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
 def devig_two_way(decimal_over: float, decimal_under: float) -> Optional[Tuple[float, float]]:
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import pytest
+
+from src.db import connect, init_db
+
+
+@pytest.fixture
+def con(tmp_path):
+    con = connect(str(tmp_path / "app.db"))
+    init_db(con)
+    yield con
+    con.close()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any
+
+from src.collect import _INSERT_SNAP_SQL, upsert_fixtures
+from src.db import insert_values
+
+
+def add_fixture(con, fixture_id: str, commence: str, home: str, away: str, status: str = "TIMED") -> None:
+    upsert_fixtures(
+        con,
+        {
+            "matches": [
+                {
+                    "id": fixture_id,
+                    "utcDate": commence,
+                    "status": status,
+                    "matchday": 1,
+                    "homeTeam": {"name": home},
+                    "awayTeam": {"name": away},
+                    "score": {"fullTime": {}},
+                }
+            ]
+        },
+    )
+
+
+def add_snapshots(con, rows: list[tuple[Any, ...]]) -> int:
+    # (captured_at, fixture_id, bookmaker, market, line, over_price, under_price)
+    return insert_values(con, _INSERT_SNAP_SQL, rows, width=7)
+
+
+def event(event_id: str, commence: str, home: str, away: str, over: float = 1.9, under: float = 1.95) -> dict[str, Any]:
+    return {
+        "id": event_id,
+        "commence_time": commence,
+        "home_team": home,
+        "away_team": away,
+        "bookmakers": [
+            {
+                "key": "wh",
+                "title": "William Hill",
+                "markets": [
+                    {
+                        "key": "totals",
+                        "outcomes": [
+                            {"name": "Over", "price": over, "point": 2.5},
+                            {"name": "Under", "price": under, "point": 2.5},
+                        ],
+                    }
+                ],
+            }
+        ],
+    }
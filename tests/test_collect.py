@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from src.collect import _norm_team, build_fixture_index, store_base_market_snapshots
+from tests.helpers import add_fixture, event
+
+KICKOFF = "2030-01-01T15:00:00Z"
+
+
+def test_norm_team_matches_across_feeds():
+    assert _norm_team("Brighton & Hove Albion FC") == _norm_team("Brighton and Hove Albion")
+    assert _norm_team("AFC Bournemouth") == _norm_team("Bournemouth")
+    assert _norm_team("  Wolverhampton Wanderers FC ") == "wolverhampton wanderers"
+    assert _norm_team("Nottingham Forest FC") != _norm_team("Forest Green Rovers")
+    assert _norm_team(None) == ""
+
+
+def test_fixture_index_matches_odds_api_names(con):
+    add_fixture(con, "1", KICKOFF, "Brighton & Hove Albion FC", "AFC Bournemouth")
+    idx = build_fixture_index(con)
+    assert idx[(KICKOFF, _norm_team("Brighton and Hove Albion"), _norm_team("Bournemouth"))] == "1"
+
+
+def test_unchanged_prices_are_skipped(con):
+    add_fixture(con, "1", KICKOFF, "Arsenal FC", "Chelsea FC")
+
+    assert store_base_market_snapshots(con, [event("e1", KICKOFF, "Arsenal", "Chelsea")], "2029-12-30T10:00:00Z") == 1
+    # Same prices again: nothing written
+    assert store_base_market_snapshots(con, [event("e1", KICKOFF, "Arsenal", "Chelsea")], "2029-12-30T11:00:00Z") == 0
+    # A moved price is written
+    moved = event("e1", KICKOFF, "Arsenal", "Chelsea", over=2.0)
+    assert store_base_market_snapshots(con, [moved], "2029-12-30T12:00:00Z") == 1
+
+    assert con.execute("SELECT COUNT(*) FROM odds_snapshots").fetchone()[0] == 2
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from src import db
+from src.collect import _FIX_CONFLICT_SQL, _INSERT_FIX_SQL
+from tests.helpers import add_fixture, add_snapshots
+
+FIX_ROW = ("1", "2030-01-01T15:00:00Z", 1, "TIMED", "Arsenal FC", "Chelsea FC", None, None, "t0")
+
+
+def test_insert_values_counts_rows_across_statements(con, monkeypatch):
+    # Force several statements and several transactions per call
+    monkeypatch.setattr(db, "MAX_BIND_VARS", 7 * 3)
+    monkeypatch.setattr(db, "TXN_ROWS", 4)
+    add_fixture(con, "1", "2030-01-01T15:00:00Z", "Arsenal FC", "Chelsea FC")
+    rows = [("t", "1", f"book{i}", "totals", 2.5, 1.9, 1.9) for i in range(10)]
+
+    assert add_snapshots(con, iter(rows)) == 10
+    assert con.execute("SELECT COUNT(*) FROM odds_snapshots").fetchone()[0] == 10
+    assert add_snapshots(con, []) == 0
+
+
+def test_insert_values_does_not_count_unchanged_upserts(con):
+    def upsert(rows):
+        return db.insert_values(con, _INSERT_FIX_SQL, rows, width=9, sql_tail=_FIX_CONFLICT_SQL)
+
+    assert upsert([FIX_ROW]) == 1
+    # Identical apart from last_updated_utc: the DO UPDATE ... WHERE skips it
+    assert upsert([FIX_ROW[:-1] + ("t1",)]) == 0
+    assert upsert([FIX_ROW[:3] + ("FINISHED",) + FIX_ROW[4:]]) == 1
+
+
+def test_transaction_nests_inside_callers_transaction(con):
+    con.execute("INSERT INTO meta (key, value) VALUES ('outer', '1')")
+    assert con.in_transaction
+
+    with db.transaction(con):
+        con.execute("INSERT INTO meta (key, value) VALUES ('inner', '1')")
+    try:
+        with db.transaction(con):
+            con.execute("INSERT INTO meta (key, value) VALUES ('failed', '1')")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    # Neither block committed the caller's work; the failed one undid only itself
+    assert con.in_transaction
+    keys = [k for (k,) in con.execute("SELECT key FROM meta ORDER BY key")]
+    assert keys == ["inner", "outer"]
+    con.rollback()
+    assert con.execute("SELECT COUNT(*) FROM meta").fetchone()[0] == 0
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src import export
+from tests.helpers import add_fixture, add_snapshots
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_site_feed_matches_committed_odds_json(tmp_path):
+    # The committed odds.json and app.db are published together by the workflow
+    db_path = tmp_path / "app.db"
+    shutil.copy(ROOT / "data" / "app.db", db_path)
+    expected = json.loads((ROOT / "site" / "public" / "odds.json").read_bytes())
+
+    con = export.connect(str(db_path))
+    cur = con.execute(export._LATEST_ODDS_SQL)
+    chunks: list[bytes] = []
+    n = export._write_items(cur, chunks.append, False, datetime(2030, 1, 1, tzinfo=timezone.utc))
+    con.close()
+
+    payload = json.loads(b"".join(chunks))
+    assert payload["generated_at_utc"] == "2030-01-01T00:00:00Z"
+    assert n == payload["count"] == expected["count"] == len(expected["items"])
+    assert list(payload["items"][0]) == list(expected["items"][0])
+
+    def key(item):
+        return (item["fixture_id"], item["bookmaker"], item["market"], item["line"])
+
+    assert sorted(payload["items"], key=key) == sorted(expected["items"], key=key)
+
+
+def test_export_skips_unchanged_db_until_forced(con, tmp_path, monkeypatch, capsys):
+    add_fixture(con, "1", "2030-01-01T15:00:00Z", "Arsenal FC", "Chelsea FC")
+    add_snapshots(con, [("t0", "1", "book", "totals", 2.5, 1.9, 1.95)])
+    out_path = tmp_path / "site" / "history.json"
+
+    def export_main(*extra: str) -> str:
+        argv = ["export", "--db-path", str(tmp_path / "app.db"), "--out-path", str(out_path), *extra]
+        monkeypatch.setattr("sys.argv", argv)
+        export.main()
+        return capsys.readouterr().out
+
+    assert export_main().startswith("Exported 1 ")
+    # Stamps sit next to the DB, not beside the published files
+    assert set(json.loads((tmp_path / "export_stamps.json").read_bytes())) == {str(out_path)}
+    assert sorted(p.name for p in out_path.parent.iterdir()) == ["history.json", "history.json.gz"]
+
+    assert export_main().startswith("[export] no change")
+    assert export_main("--force").startswith("Exported 1 ")
+    # A new layout or query invalidates the stamp as well as new rows do
+    monkeypatch.setattr(export, "_STAMP_VERSION", export._STAMP_VERSION + 1)
+    assert export_main().startswith("Exported 1 ")
+    monkeypatch.setattr(export, "_EXPORT_SQL", export._EXPORT_SQL + " ")
+    assert export_main().startswith("Exported 1 ")
+    add_snapshots(con, [("t1", "1", "book", "totals", 2.5, 1.8, 2.05)])
+    assert export_main().startswith("Exported 2 ")
+    assert export_main().startswith("[export] no change")
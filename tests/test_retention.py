@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import json
+from dataclasses import replace
+
+from src import export
+from src.collect import store_base_market_snapshots
+from src.db import prune_snapshots
+from tests.helpers import add_fixture, event
+
+KICKOFF = "2030-01-01T15:00:00Z"
+
+
+def test_prune_keeps_latest_price_per_key(con, tmp_path):
+    add_fixture(con, "1", KICKOFF, "Arsenal FC", "Chelsea FC")
+    add_fixture(con, "2", KICKOFF, "Everton FC", "Fulham FC")
+
+    # Fixture 1's price never moves, so only its first snapshot is ever written;
+    # fixture 2's moves every run.
+    for i in range(20):
+        events = [
+            event("e1", KICKOFF, "Arsenal", "Chelsea", over=1.9),
+            event("e2", KICKOFF, "Everton", "Fulham", over=1.5 + i / 100),
+        ]
+        store_base_market_snapshots(con, events, f"2029-12-30T10:{i:02d}:00Z")
+
+    assert prune_snapshots(con, keep=5) > 0
+    rows = con.execute("SELECT fixture_id, captured_at_utc FROM odds_snapshots ORDER BY captured_at_utc").fetchall()
+    assert ("1", "2029-12-30T10:00:00Z") in rows
+    # Replaced rows beyond the keep window are gone
+    assert ("2", "2029-12-30T10:00:00Z") not in rows
+
+    spec = replace(export.EXPORTS[0], out_path=str(tmp_path / "odds.json"))
+    ex = export.connect(str(tmp_path / "app.db"))
+    export.run_export(ex, spec)
+    ex.close()
+    items = json.loads((tmp_path / "odds.json").read_bytes())["items"]
+    by_fixture = {i["fixture_id"]: i for i in items}
+    assert by_fixture["1"]["over_price"] == 1.9
+    assert by_fixture["2"]["over_price"] == 1.69
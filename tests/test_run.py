@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+
+import orjson
+import pytest
+
+from src import collect
+from tests.helpers import event
+
+KICKOFF = "2030-01-01T15:00:00Z"
+
+SETTINGS = SimpleNamespace(
+    football_data_token="fd",
+    odds_api_key="key",
+    odds_sport_key="soccer_epl",
+    odds_regions="uk",
+    odds_markets="totals",
+    odds_format="decimal",
+    date_format="iso",
+)
+
+MATCHES = {
+    "matches": [
+        {
+            "id": 1,
+            "utcDate": KICKOFF,
+            "status": "TIMED",
+            "matchday": 1,
+            "homeTeam": {"name": "Arsenal FC"},
+            "awayTeam": {"name": "Chelsea FC"},
+            "score": {"fullTime": {}},
+        }
+    ]
+}
+
+BTTS = {"bookmakers": [{"title": "Bet365", "markets": [{"key": "btts", "outcomes": [
+    {"name": "Yes", "price": 1.8},
+    {"name": "No", "price": 2.0},
+]}]}]}
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: Any = None, headers: dict[str, str] | None = None):
+        self.status_code = status_code
+        self.content = orjson.dumps(body)
+        self.text = self.content.decode()
+        self.headers = headers or {}
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+class FakeApi:
+    """Serves both feeds; answers 304 whenever the client sends a matching ETag."""
+
+    def __init__(self):
+        self.calls: list[str] = []
+        self.event_status = 200
+        self.out_of_credits = False
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls.append(url)
+        if self.out_of_credits and "football-data" not in url:
+            return FakeResponse(401, {"error_code": "OUT_OF_USAGE_CREDITS"})
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        if "football-data" in url:
+            return FakeResponse(200, MATCHES, {"ETag": '"v1"'})
+        if "/events/" in url:
+            return FakeResponse(self.event_status, BTTS if self.event_status == 200 else {})
+        return FakeResponse(200, [event("ev1", KICKOFF, "Arsenal", "Chelsea")], {"ETag": '"v1"'})
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = FakeApi()
+    monkeypatch.setattr(collect._SESSION, "get", api.get)
+    return api
+
+
+def test_base_odds_304_skips_insert_but_not_btts(con, api):
+    api.event_status = 404  # BTTS unavailable on the first run
+    first = collect.run(con, SETTINGS, 2, 10)
+    assert (first["fixtures"], first["base"], first["btts"]) == (1, 1, 0)
+    assert "apiKey" not in collect.load_validators(con, collect.ODDS_BASE_META_KEY)["params"]
+
+    api.event_status = 200
+    api.calls.clear()
+    second = collect.run(con, SETTINGS, 2, 10)
+    assert (second["fixtures"], second["base"], second["btts"]) == (0, 0, 1)
+    assert any("/events/ev1/" in url for url in api.calls)
+    assert con.execute("SELECT COUNT(*) FROM odds_snapshots WHERE market = 'btts'").fetchone()[0] == 1
+
+
+def test_out_of_credits_keeps_btts_candidates_for_the_next_304(con, api):
+    api.event_status = 404
+    collect.run(con, SETTINGS, 2, 10)
+    validators = collect.load_validators(con, collect.ODDS_BASE_META_KEY)
+
+    api.out_of_credits = True
+    skipped = collect.run(con, SETTINGS, 2, 10)
+    assert (skipped["base"], skipped["btts"]) == (0, 0)
+    assert collect.load_validators(con, collect.ODDS_BASE_META_KEY) == validators
+
+    # Credits are back and nothing moved: the base call answers 304
+    api.out_of_credits = False
+    api.event_status = 200
+    api.calls.clear()
+    after = collect.run(con, SETTINGS, 2, 10)
+    assert (after["base"], after["btts"]) == (0, 1)
+    assert any("/events/ev1/" in url for url in api.calls)